@@ -0,0 +1,279 @@
+"""Move generation on the packed bitboard state, free of Enum and Move objects."""
+
+from array import array
+
+# Pawn piece values as plain ints, matching game.Piece. The other kinds follow
+# them in the same order as their bitboards.
+WP = 1
+BP = 5
+
+# Game.state holds the white bitboards, the black bitboards and the turn, so
+# the bitboard of a piece is at index Piece value - 1
+WHITE = 0
+BLACK = 4
+TURN = 8
+
+# Offsets from WHITE / BLACK in Game.state: the kind of a piece is
+# Piece value - 1 - WHITE for white pieces and Piece value - 1 - BLACK for black
+PAWN = 0
+ROOK = 1
+KNIGHT = 2
+BISHOP = 3
+
+# Square (x, y) maps to bit y * 3 + x
+FULL_BOARD = 0x1FF
+# Pawns can't be placed on the rank they would promote on
+WHITE_PLACE_MASK = 0b111_111_000
+BLACK_PLACE_MASK = 0b000_111_111
+
+
+# (dx, dy) steps per piece, only used to build the tables below
+_KNIGHT_DIFFS = ((1, 2), (2, 1), (-1, 2), (-2, 1), (1, -2), (2, -1), (-1, -2), (-2, -1))
+_ROOK_DIFFS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+_BISHOP_DIFFS = ((1, 1), (-1, 1), (1, -1), (-1, -1))
+_WHITE_PAWN_PUSH_DIFFS = ((0, -1),)
+_WHITE_PAWN_CAPTURE_DIFFS = ((1, -1), (-1, -1))
+_BLACK_PAWN_PUSH_DIFFS = ((0, 1),)
+_BLACK_PAWN_CAPTURE_DIFFS = ((1, 1), (-1, 1))
+
+
+def step_attacks(sq: int, diffs: tuple[tuple[int, int], ...]) -> int:
+    x, y = sq % 3, sq // 3
+    attacks = 0
+    for dx, dy in diffs:
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < 3 and 0 <= ny < 3:
+            attacks |= 1 << (ny * 3 + nx)
+    return attacks
+
+
+# Squares a knight can jump to from each square
+KNIGHT_ATTACKS = tuple(step_attacks(sq, _KNIGHT_DIFFS) for sq in range(9))
+
+# Squares a pawn can push to or capture on from each square. White pawns move
+# towards y = 0 and promote there, black pawns towards y = 2.
+WHITE_PAWN_PUSH = tuple(step_attacks(sq, _WHITE_PAWN_PUSH_DIFFS) for sq in range(9))
+WHITE_PAWN_CAPTURES = tuple(
+    step_attacks(sq, _WHITE_PAWN_CAPTURE_DIFFS) for sq in range(9)
+)
+BLACK_PAWN_PUSH = tuple(step_attacks(sq, _BLACK_PAWN_PUSH_DIFFS) for sq in range(9))
+BLACK_PAWN_CAPTURES = tuple(
+    step_attacks(sq, _BLACK_PAWN_CAPTURE_DIFFS) for sq in range(9)
+)
+WHITE_PROMOTION_RANK = 0b000_000_111
+BLACK_PROMOTION_RANK = 0b111_000_000
+
+
+def rays(sq: int, diffs: tuple[tuple[int, int], ...]) -> tuple[tuple[int, ...], ...]:
+    # Bits of the squares along each direction, nearest first
+    x, y = sq % 3, sq // 3
+    result = []
+    for dx, dy in diffs:
+        ray = []
+        nx, ny = x + dx, y + dy
+        while 0 <= nx < 3 and 0 <= ny < 3:
+            ray.append(1 << (ny * 3 + nx))
+            nx, ny = nx + dx, ny + dy
+        result.append(tuple(ray))
+    return tuple(result)
+
+
+ROOK_RAYS = tuple(rays(sq, _ROOK_DIFFS) for sq in range(9))
+BISHOP_RAYS = tuple(rays(sq, _BISHOP_DIFFS) for sq in range(9))
+
+
+def slider_attacks(sq_rays: tuple[tuple[int, ...], ...], occ: int) -> int:
+    # Rays stop at, but include, the first occupied square
+    attacks = 0
+    for ray in sq_rays:
+        for target in ray:
+            attacks |= target
+            if occ & target:
+                break
+    return attacks
+
+
+# Sliding attacks indexed by [square][occupancy of the whole board]
+ROOK_ATTACKS = tuple(
+    tuple(slider_attacks(ROOK_RAYS[sq], occ) for occ in range(512)) for sq in range(9)
+)
+BISHOP_ATTACKS = tuple(
+    tuple(slider_attacks(BISHOP_RAYS[sq], occ) for occ in range(512)) for sq in range(9)
+)
+SLIDER_ATTACKS = ((ROOK, ROOK_ATTACKS), (BISHOP, BISHOP_ATTACKS))
+
+
+# More moves than any position can have: 9 pieces with at most 12 moves each
+MAX_MOVES = 108
+
+
+# Rows, columns and diagonals as bitboards
+ROWS = (0b000_000_111, 0b000_111_000, 0b111_000_000)
+COLS = (0b001_001_001, 0b010_010_010, 0b100_100_100)
+DIAGS = (0b100_010_001, 0b001_010_100)
+LINES = ROWS + COLS + DIAGS
+
+
+# Whether an occupancy holds a full line, for every 9-bit occupancy
+THREE_IN_A_ROW = tuple(
+    any((bb & line) == line for line in LINES) for bb in range(FULL_BOARD + 1)
+)
+
+
+# Moves are packed into 16 bits as start << 12 | end << 8 | piece << 4 | promotion,
+# with squares numbered y * 3 + x and pieces given by their Piece value.
+# Placements have no end square.
+NO_SQUARE = 0xF
+
+
+def ordered_steps(sq: int, diffs: tuple[tuple[int, int], ...]) -> list[int]:
+    # Target squares in the order of diffs, skipping those off the board
+    return [
+        bit.bit_length() - 1
+        for bit in (step_attacks(sq, (diff,)) for diff in diffs)
+        if bit
+    ]
+
+
+def ray_squares(sq_rays: tuple[tuple[int, ...], ...]) -> list[int]:
+    # Squares along the rays, one ray after the other and nearest first
+    return [bit.bit_length() - 1 for ray in sq_rays for bit in ray]
+
+
+def move_order() -> dict[int, int]:
+    # Moves are listed by file a to c, then from rank 1 up, then in each piece's
+    # direction order with promotions right after the plain pawn move
+    order = {}
+    for sq in range(9):
+        start = (sq % 3 * 3 + 2 - sq // 3) << 8
+        for base, push, captures in (
+            (WP, _WHITE_PAWN_PUSH_DIFFS, _WHITE_PAWN_CAPTURE_DIFFS),
+            (BP, _BLACK_PAWN_PUSH_DIFFS, _BLACK_PAWN_CAPTURE_DIFFS),
+        ):
+            order[sq << 12 | NO_SQUARE << 8 | base << 4] = start
+            targets = (
+                (PAWN, ordered_steps(sq, push + captures)),
+                (ROOK, ray_squares(ROOK_RAYS[sq])),
+                (KNIGHT, ordered_steps(sq, _KNIGHT_DIFFS)),
+                (BISHOP, ray_squares(BISHOP_RAYS[sq])),
+            )
+            for kind, ends in targets:
+                for i, end in enumerate(ends):
+                    squares_moved = sq << 12 | end << 8
+                    order[squares_moved | (base + kind) << 4] = start | i << 2
+                    if kind == PAWN:
+                        for promotion in (ROOK, KNIGHT, BISHOP):
+                            promoted = base + promotion
+                            order[squares_moved | promoted << 4 | promoted] = (
+                                start | i << 2 | promotion
+                            )
+    return order
+
+
+# Sort key per packed move, giving the order Game.allowed_moves lists them in
+MOVE_ORDER = move_order()
+
+
+def gen_moves(state: array) -> array:
+    """Legal moves for the side to move in a Game.state, packed as described above."""
+    turn = state[TURN]
+    mine, theirs = (WHITE, BLACK) if turn else (BLACK, WHITE)
+    # Piece value of the mover's pawn, the other kinds follow in bitboard order
+    base = WP if turn else BP
+    own = (
+        state[mine + PAWN]
+        | state[mine + ROOK]
+        | state[mine + KNIGHT]
+        | state[mine + BISHOP]
+    )
+    enemy = (
+        state[theirs + PAWN]
+        | state[theirs + ROOK]
+        | state[theirs + KNIGHT]
+        | state[theirs + BISHOP]
+    )
+    occ = own | enemy
+    # Kinds a pawn may still promote to: those not already on the board
+    missing = (
+        (not state[mine + ROOK]) << ROOK
+        | (not state[mine + KNIGHT]) << KNIGHT
+        | (not state[mine + BISHOP]) << BISHOP
+    )
+    moves = array("H", bytes(2 * MAX_MOVES))
+    n = 0
+
+    # Pawn placements
+    spots = ~occ & (WHITE_PLACE_MASK if turn else BLACK_PLACE_MASK)
+    placement = NO_SQUARE << 8 | base << 4
+    while spots:
+        bit = spots & -spots
+        spots ^= bit
+        moves[n] = (bit.bit_length() - 1) << 12 | placement
+        n += 1
+
+    # Piece movement, one kind at a time so no square needs its piece looked up
+    if turn:
+        push, captures = WHITE_PAWN_PUSH, WHITE_PAWN_CAPTURES
+        promotion_rank = WHITE_PROMOTION_RANK
+    else:
+        push, captures = BLACK_PAWN_PUSH, BLACK_PAWN_CAPTURES
+        promotion_rank = BLACK_PROMOTION_RANK
+    pawns = state[mine + PAWN]
+    while pawns:
+        bit = pawns & -pawns
+        sq = bit.bit_length() - 1
+        pawns ^= bit
+        targets = push[sq] & ~occ | captures[sq] & enemy
+        while targets:
+            target = targets & -targets
+            targets ^= target
+            squares_moved = sq << 12 | (target.bit_length() - 1) << 8
+            moves[n] = squares_moved | base << 4
+            n += 1
+            if target & promotion_rank:
+                for kind in (ROOK, KNIGHT, BISHOP):
+                    if missing & 1 << kind:
+                        promoted = base + kind
+                        moves[n] = squares_moved | promoted << 4 | promoted
+                        n += 1
+
+    knights = state[mine + KNIGHT]
+    while knights:
+        bit = knights & -knights
+        sq = bit.bit_length() - 1
+        knights ^= bit
+        targets = KNIGHT_ATTACKS[sq] & ~own
+        move = sq << 12 | (base + KNIGHT) << 4
+        while targets:
+            target = targets & -targets
+            targets ^= target
+            moves[n] = move | (target.bit_length() - 1) << 8
+            n += 1
+
+    for kind, attacks in SLIDER_ATTACKS:
+        pieces = state[mine + kind]
+        while pieces:
+            bit = pieces & -pieces
+            sq = bit.bit_length() - 1
+            pieces ^= bit
+            targets = attacks[sq][occ] & ~own
+            move = sq << 12 | (base + kind) << 4
+            while targets:
+                target = targets & -targets
+                targets ^= target
+                moves[n] = move | (target.bit_length() - 1) << 8
+                n += 1
+
+    # Filter out moves that would put you in check: only capturing a piece of
+    # the opponent's row gets you out of it
+    if THREE_IN_A_ROW[enemy]:
+        return array(
+            "H",
+            (
+                m
+                for m in moves[:n]
+                if (m >> 8 & 0xF) != NO_SQUARE
+                and not THREE_IN_A_ROW[enemy & ~(1 << (m >> 8 & 0xF))]
+            ),
+        )
+    return moves[:n]
@@ -1,9 +1,31 @@
 from operator import is_
-import os
-from enum import Enum
-
-
-class Piece(Enum):
+import random
+import sys
+from array import array
+from enum import IntEnum
+
+from fastgen import (
+    BLACK,
+    MOVE_ORDER,
+    NO_SQUARE,
+    THREE_IN_A_ROW,
+    TURN,
+    WHITE,
+    gen_moves,
+)
+
+
+# Per piece value lookups, an Enum can't hold them as class attributes
+_UNICHARS = (" ", "♙", "♖", "♘", "♗", "♟", "♜", "♞", "♝")
+_IS_WHITE = (False, True, True, True, True, False, False, False, False)
+_IS_BLACK = (False, False, False, False, False, True, True, True, True)
+_IS_PAWN = (False, True, False, False, False, True, False, False, False)
+_IS_ROOK = (False, False, True, False, False, False, True, False, False)
+_IS_KNIGHT = (False, False, False, True, False, False, False, True, False)
+_IS_BISHOP = (False, False, False, False, True, False, False, False, True)
+
+
+class Piece(IntEnum):
     EMPTY = 0
     WHITE_PAWN = 1
     WHITE_ROOK = 2
@@ -15,31 +37,47 @@ class Piece(Enum):
     BLACK_BISHOP = 8
 
     def unicode_character(self):
-        return " ♙♖♘♗♟♜♞♝"[self.value]
+        return _UNICHARS[self]
 
     def is_white(self):
-        return 1 <= self.value <= 4
+        return _IS_WHITE[self]
 
     def is_black(self):
-        return 5 <= self.value <= 8
+        return _IS_BLACK[self]
 
     def is_empty(self):
-        return self == Piece.EMPTY
+        return self == 0
 
     def is_pawn(self):
-        return self.value % 4 == 1
+        return _IS_PAWN[self]
 
     def is_rook(self):
-        return self.value % 4 == 2
+        return _IS_ROOK[self]
 
     def is_knight(self):
-        return self.value % 4 == 3
+        return _IS_KNIGHT[self]
 
     def is_bishop(self):
-        return self.value % 4 == 0 and self.value != 0
+        return _IS_BISHOP[self]
+
+
+# Piece members by value, cheaper to index than calling Piece(value)
+PIECES = tuple(Piece)
+
+
+# Move notation per coordinate, per square (y * 3 + x) and per (start, end) pair
+_FILE = ("a", "b", "c")
+_RANK = ("3", "2", "1")
+_PROMO = ("", "", "R", "K", "B", "", "R", "K", "B")
+_PLACE = tuple(_FILE[sq % 3] + _RANK[sq // 3] for sq in range(9))
+_SLIDE = tuple(
+    tuple(_PLACE[sq] + "-" + _PLACE[end] for end in range(9)) for sq in range(9)
+)
 
 
 class Move:
+    __slots__ = ("end_x", "end_y", "piece", "promotion", "start_x", "start_y")
+
     start_x: int
     start_y: int
     end_x: int | None
@@ -56,31 +94,35 @@ class Move:
         end_y: int | None = None,
         promotion: Piece | None = None,
     ):
-        self.start_x = start_x
-        self.start_y = start_y
-        self.piece = piece
-        self.end_x = end_x
-        self.end_y = end_y
-        self.promotion = promotion
+        # Moves are hashed and shared through _MOVE_POOL, so fields are set once
+        set_field = object.__setattr__
+        set_field(self, "start_x", start_x)
+        set_field(self, "start_y", start_y)
+        set_field(self, "piece", piece)
+        set_field(self, "end_x", end_x)
+        set_field(self, "end_y", end_y)
+        set_field(self, "promotion", promotion)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"cannot assign to Move.{name}, moves are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"cannot delete Move.{name}, moves are immutable")
+
+    def __reduce__(self):
+        # Rebuild through __init__ when copied or pickled, as __setattr__ refuses.
+        # _key() lists the fields in __init__ argument order.
+        return Move, self._key()
 
     def to_string(self) -> str:
-        x_mapping = {0: "a", 1: "b", 2: "c"}
-        y_mapping = {0: "3", 1: "2", 2: "1"}
-        promotion_mapping = {
-            Piece.WHITE_ROOK: "R",
-            Piece.WHITE_KNIGHT: "K",
-            Piece.WHITE_BISHOP: "B",
-            Piece.BLACK_ROOK: "R",
-            Piece.BLACK_KNIGHT: "K",
-            Piece.BLACK_BISHOP: "B",
-        }
-
-        s = x_mapping.get(self.start_x, "") + y_mapping.get(self.start_y, "")
+        start = self.start_y * 3 + self.start_x
         if self.end_x is not None and self.end_y is not None:
-            s += "-" + x_mapping.get(self.end_x, "") + y_mapping.get(self.end_y, "")
+            s = _SLIDE[start][self.end_y * 3 + self.end_x]
+        else:
+            s = _PLACE[start]
 
         if self.promotion:
-            s += promotion_mapping.get(self.promotion, "")
+            s += _PROMO[self.promotion]
 
         return s
 
@@ -90,240 +132,211 @@ class Move:
     def __repr__(self):
         return self.to_string()
 
+    def _key(self) -> tuple:
+        return (
+            self.start_x,
+            self.start_y,
+            self.piece,
+            self.end_x,
+            self.end_y,
+            self.promotion,
+        )
+
     def __eq__(self, other):
         if isinstance(other, Move):
-            return (
-                self.start_x == other.start_x
-                and self.start_y == other.start_y
-                and self.piece == other.piece
-                and self.end_x == other.end_x
-                and self.end_y == other.end_y
-                and self.promotion == other.promotion
-            )
+            return self._key() == other._key()
         return False
 
+    def __hash__(self):
+        return hash(self._key())
+
+
+# Zobrist keys indexed by [Piece value][square], seeded so hashes are reproducible.
+# Empty squares hash to 0 so captures onto them need no special case.
+_zobrist_rng = random.Random(20240101)
+ZOBRIST = [[0] * 9] + [
+    [_zobrist_rng.getrandbits(64) for sq in range(9)] for piece in range(1, 9)
+]
+ZOBRIST_TURN = _zobrist_rng.getrandbits(64)
+
+# Clears the terminal and homes the cursor, without spawning a `clear` process
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+
+# Board display, filled square by square with piece characters, then the side to move
+_BOARD_TEMPLATE = (
+    "  a b c\n3 {} {} {} 3\n2 {} {} {} 2\n1 {} {} {} 1\n  a b c\n{} to move"
+)
+
+# Packed legal moves per position, keyed by Zobrist hash and shared by all games.
+# Flushed once it holds MOVE_CACHE_SIZE entries.
+_MOVE_CACHE: dict[int, array] = {}
+MOVE_CACHE_SIZE = 1 << 16
+
+
+# Moves handed out by unpack_move, by packed code (see fastgen.NO_SQUARE for the
+# layout). There are only a few hundred distinct moves and they are immutable, so
+# each is built once and shared.
+_MOVE_POOL: dict[int, Move] = {}
+
+
+def unpack_move(code: int) -> Move:
+    move = _MOVE_POOL.get(code)
+    if move is None:
+        start, end = code >> 12, code >> 8 & 0xF
+        promotion = code & 0xF
+        move = _MOVE_POOL[code] = Move(
+            start % 3,
+            start // 3,
+            PIECES[code >> 4 & 0xF],
+            None if end == NO_SQUARE else end % 3,
+            None if end == NO_SQUARE else end // 3,
+            PIECES[promotion] if promotion else None,
+        )
+    return move
+
 
 class Game:
+    __slots__ = ("_check", "board", "state", "zobrist")
+
     max_x = 3
     max_y = 3
-    board: list[list[Piece]]
-    turn: bool = True
+    # Bitboards and turn, laid out as described at WHITE / BLACK / TURN
+    state: array
+    # Piece value per square y * 3 + x, mirroring the bitboards
+    board: array
+    # Zobrist hash of the pieces on the board, the turn is mixed in on lookup
+    zobrist: int
+    # Cached in_check result, None until computed for the current position
+    _check: bool | None
 
     def __init__(self):
-        self.board = [
-            [Piece.EMPTY for x in range(self.max_x)] for y in range(self.max_y)
-        ]
+        self.state = array("H", bytes(18))
+        self.board = array("b", bytes(9))
+        self.zobrist = 0
+        self.turn = True
+        self._check = None
+
+    @property
+    def turn(self) -> bool:
+        return bool(self.state[TURN])
+
+    @turn.setter
+    def turn(self, turn: bool) -> None:
+        self.state[TURN] = turn
+        self._check = None
 
     def __repr__(self):
-        s = (
-            f"  a b c\n"
-            f"3 {self.board[0][0].unicode_character()} {self.board[0][1].unicode_character()} {self.board[0][2].unicode_character()} 3\n"
-            f"2 {self.board[1][0].unicode_character()} {self.board[1][1].unicode_character()} {self.board[1][2].unicode_character()} 2\n"
-            f"1 {self.board[2][0].unicode_character()} {self.board[2][1].unicode_character()} {self.board[2][2].unicode_character()} 1\n"
-            f"  a b c\n"
-            f"{'White' if self.turn else 'Black'} to move"
+        s = _BOARD_TEMPLATE.format(
+            *[_UNICHARS[piece] for piece in self.board],
+            "White" if self.turn else "Black",
         )
         if self.in_check():
             s += "\nYou are in check!"
 
         return s
 
-    def allowed_moves(self) -> list[Move]:
-        allowed_moves: list[Move] = []
-
-        # Piece movement
-        for x in range(self.max_x):
-            for y in reversed(range(self.max_y)):
-                piece = self.board[y][x]
-                if piece.is_black() and self.turn:
-                    continue
-                if piece.is_white() and not self.turn:
-                    continue
-
-                if piece == Piece.EMPTY and (
-                    (y != 0 and self.turn) or (y != 2 and not self.turn)
-                ):  # Pawn placements
-                    placement_pawn = Piece.WHITE_PAWN if self.turn else Piece.BLACK_PAWN
-                    allowed_moves.append(
-                        Move(start_x=x, start_y=y, piece=placement_pawn)
-                    )
-
-                if piece.is_pawn():
-                    allowed_moves.extend(self.pawn_movements(x, y))
-                if piece.is_knight():
-                    allowed_moves.extend(self.knight_movements(x, y))
-                if piece.is_bishop():
-                    allowed_moves.extend(self.bischop_movement(x, y))
-                if piece.is_rook():
-                    allowed_moves.extend(self.rook_movement(x, y))
-
-        # Filter out moves that would put you in check
-        allowed_moves = [
-            move for move in allowed_moves if not self.would_put_in_check(move)
-        ]
-        return allowed_moves
-
-    def pawn_movements(self, x: int, y: int) -> list[Move]:
-        allowed_moves: list[Move] = []
-        directions = [0, 1, -1]
-        for dx in directions:
-            dy = -1 if self.turn else 1
-            nx, ny = x + dx, y + dy
-
-            if not (0 <= nx < self.max_x and 0 <= ny < self.max_y):
-                continue
-
-            target_piece = self.board[ny][nx]
-            is_empty = target_piece.is_empty()
-            is_opposite_color = (target_piece.is_white() and not self.turn) or (
-                target_piece.is_black() and self.turn
-            )
-
-            if (is_empty and dx == 0) or (is_opposite_color and dx != 0):
-                pawn_movement = Move(
-                    start_x=x, start_y=y, piece=self.board[y][x], end_x=nx, end_y=ny
-                )
-                if ny in [0, 2]:
-                    allowed_moves.extend(self.promote(pawn_movement))
-                else:
-                    allowed_moves.append(pawn_movement)
-        return allowed_moves
-
-    def knight_movements(self, x: int, y: int) -> list[Move]:
-        allowed_moves: list[Move] = []
-        diffs = [(1, 2), (2, 1), (-1, 2), (-2, 1), (1, -2), (2, -1), (-1, -2), (-2, -1)]
-        for dx, dy in diffs:
-            nx, ny = x + dx, y + dy
-            if nx >= 0 and nx < self.max_x and ny >= 0 and ny < self.max_y:
-                target_piece = self.board[ny][nx]
-                is_empty = target_piece == Piece.EMPTY
-                is_opposite_color = (target_piece.is_white() and not self.turn) or (
-                    target_piece.is_black() and self.turn
-                )
-                if is_empty or is_opposite_color:
-                    allowed_moves.append(Move(x, y, self.board[y][x], nx, ny))
-        return allowed_moves
-
-    def bischop_movement(self, x: int, y: int) -> list[Move]:
-        allowed_moves: list[Move] = []
-        diffs = [(1, 1), (-1, 1), (1, -1), (-1, -1)]
-        for dx, dy in diffs:
-            nx, ny = x + dx, y + dy
-            while nx >= 0 and nx < self.max_x and ny >= 0 and ny < self.max_y:
-                target_piece = self.board[ny][nx]
-                is_empty = target_piece == Piece.EMPTY
-                is_opposite_color = (target_piece.is_white() and not self.turn) or (
-                    target_piece.is_black() and self.turn
-                )
-                if is_empty or is_opposite_color:
-                    allowed_moves.append(Move(x, y, self.board[y][x], nx, ny))
-                if not is_empty:
-                    break
-                nx, ny = nx + dx, ny + dy
-        return allowed_moves
-
-    def rook_movement(self, x: int, y: int) -> list[Move]:
-        allowed_moves: list[Move] = []
-        diffs = [(1, 0), (0, 1), (-1, 0), (0, -1)]
-        for dx, dy in diffs:
-            nx, ny = x + dx, y + dy
-            while nx >= 0 and nx < self.max_x and ny >= 0 and ny < self.max_y:
-                target_piece = self.board[ny][nx]
-                is_empty = target_piece == Piece.EMPTY
-                is_opposite_color = (target_piece.is_white() and not self.turn) or (
-                    target_piece.is_black() and self.turn
-                )
-                if is_empty or is_opposite_color:
-                    allowed_moves.append(Move(x, y, self.board[y][x], nx, ny))
-                if not is_empty:
-                    break
-                nx, ny = nx + dx, ny + dy
-        return allowed_moves
-
-    def promote(self, move: Move) -> list[Move]:
-        allowed_moves: list[Move] = [move]
-        # You can only promote to a piece if it is not already on the board
-        pieces = [
-            Piece.WHITE_ROOK,
-            Piece.WHITE_KNIGHT,
-            Piece.WHITE_BISHOP,
-        ]
-        if not self.turn:
-            pieces = [
-                Piece.BLACK_ROOK,
-                Piece.BLACK_KNIGHT,
-                Piece.BLACK_BISHOP,
-            ]
+    def generate_moves_packed(self) -> array:
+        """Legal moves packed into an array('H'), see fastgen.NO_SQUARE."""
+        state, cache = self.state, _MOVE_CACHE
+        key = (self.zobrist ^ ZOBRIST_TURN) if state[TURN] else self.zobrist
+        moves = cache.get(key)
+        if moves is None:
+            # Sorted once per position into the order the move menu lists them in
+            moves = array("H", sorted(gen_moves(state), key=MOVE_ORDER.__getitem__))
+            if len(cache) >= MOVE_CACHE_SIZE:
+                cache.clear()
+            cache[key] = moves
+        return array("H", moves)
 
-        for piece in pieces:
-            if not any(piece in row for row in self.board):
-                allowed_moves.append(
-                    Move(
-                        move.start_x, move.start_y, piece, move.end_x, move.end_y, piece
-                    )
-                )
-        return allowed_moves
+    def allowed_moves(self) -> list[Move]:
+        return [unpack_move(m) for m in self.generate_moves_packed()]
 
     def execute_move(self, move: Move) -> None:
+        self._make(move)
+
+    def _make(self, move: Move) -> tuple[int, int, int, int, int, int, bool | None]:
+        """Play the move and return what _unmake needs to take it back."""
+        state, board = self.state, self.board
+        undo_check, self._check = self._check, None
+        piece = move.piece
+        start_sq = move.start_y * 3 + move.start_x
+        zobrist = self.zobrist
         # Execute placement moves
         if move.end_x is None or move.end_y is None:
-            self.board[move.start_y][move.start_x] = move.piece
-            self.turn = not self.turn
-            return
-        # Execute movement moves
-        self.board[move.end_y][move.end_x] = move.piece
-        self.board[move.start_y][move.start_x] = Piece.EMPTY
-        self.turn = not self.turn
+            state[piece - 1] |= 1 << start_sq
+            board[start_sq] = piece
+            self.zobrist ^= ZOBRIST[piece][start_sq]
+            state[TURN] ^= 1
+            return start_sq, NO_SQUARE, 0, piece, 0, zobrist, undo_check
+        # Execute movement moves, clearing the start square and any captured piece.
+        # The moved piece differs from move.piece when a pawn promotes.
+        end_sq = move.end_y * 3 + move.end_x
+        moved, captured = board[start_sq], board[end_sq]
+        self.zobrist ^= (
+            ZOBRIST[moved][start_sq]
+            ^ ZOBRIST[captured][end_sq]
+            ^ ZOBRIST[piece][end_sq]
+        )
+        state[moved - 1] &= ~(1 << start_sq)
+        if captured:
+            state[captured - 1] &= ~(1 << end_sq)
+        state[piece - 1] |= 1 << end_sq
+        board[start_sq] = 0
+        board[end_sq] = piece
+        state[TURN] ^= 1
+        return start_sq, end_sq, moved, piece, captured, zobrist, undo_check
+
+    def _unmake(self, undo: tuple[int, int, int, int, int, int, bool | None]) -> None:
+        start_sq, end_sq, moved, piece, captured, zobrist, check = undo
+        state, board = self.state, self.board
+        if end_sq == NO_SQUARE:
+            state[piece - 1] &= ~(1 << start_sq)
+            board[start_sq] = 0
+        else:
+            state[piece - 1] &= ~(1 << end_sq)
+            if captured:
+                state[captured - 1] |= 1 << end_sq
+            state[moved - 1] |= 1 << start_sq
+            board[start_sq] = moved
+            board[end_sq] = captured
+        state[TURN] ^= 1
+        self.zobrist = zobrist
+        self._check = check
 
     def would_put_in_check(self, move: Move) -> bool:
-        # Simulate the move
-        old_board = [row.copy() for row in self.board]
-        old_turn = self.turn
-        self.execute_move(move)
-        # Check if the move would put you in check and revert turn
+        # Simulate the move, handing the turn back to the mover to test for check
+        undo = self._make(move)
         self.turn = not self.turn
         in_check = self.in_check()
-        # Revert the move
-        self.board = old_board
-        self.turn = old_turn
+        self.turn = not self.turn
+        self._unmake(undo)
         return in_check
 
     def in_check(self) -> bool:
         # You are in check if the opponent has three pieces in a row
-        def piece_of_opponent(piece: Piece) -> bool:
-            return (piece.is_white() and not self.turn) or (
-                piece.is_black() and self.turn
-            )
-
-        # check rows
-        for row in self.board:
-            if all(piece_of_opponent(piece) for piece in row):
-                return True
-
-        # check columns
-        for c in range(3):
-            column = [self.board[0][c], self.board[1][c], self.board[2][c]]
-            if all(piece_of_opponent(piece) for piece in column):
-                return True
-        # check diagonals
-        if all(piece_of_opponent(self.board[i][i]) for i in range(3)):
-            return True
-        if all(piece_of_opponent(self.board[i][2 - i]) for i in range(3)):
-            return True
-
-        return False
+        check = self._check
+        if check is None:
+            state = self.state
+            opponent = BLACK if state[TURN] else WHITE
+            check = self._check = THREE_IN_A_ROW[
+                state[opponent]
+                | state[opponent + 1]
+                | state[opponent + 2]
+                | state[opponent + 3]
+            ]
+        return check
 
     def check_mate(self) -> bool:
-        return self.in_check() and not self.allowed_moves()
+        return self.in_check() and not self.generate_moves_packed()
 
     def stalemate(self) -> bool:
-        return not self.in_check() and not self.allowed_moves()
+        return not self.in_check() and not self.generate_moves_packed()
 
 
 def main():
     game = Game()  # Assuming Game is your main class
     while True:
-        os.system("clear")
+        sys.stdout.write(CLEAR_SCREEN)
         print(game)  # Print the current state of the board
         allowed_moves = game.allowed_moves()
         if not allowed_moves: